@@ -0,0 +1,175 @@
+import os
+import gzip
+import time
+import hashlib
+import tempfile
+
+from app.config import (
+    BLOB_STORE_DIR,
+    BLOB_RETENTION_DAYS,
+    BLOB_STORE_QUOTA_BYTES
+)
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Leftover partial writes older than this are removed by the GC
+STALE_TEMP_SECONDS = 3600
+
+
+# -----------------------------
+# Paths
+# -----------------------------
+
+def blob_path(digest: str) -> str:
+    return os.path.join(BLOB_STORE_DIR, digest[:2], digest[2:] + ".gz")
+
+
+def has_blob(digest: str) -> bool:
+    return os.path.exists(blob_path(digest))
+
+
+# -----------------------------
+# Writes
+# -----------------------------
+
+def store_blob(fileobj, digest: str = None) -> str:
+    """
+    Stores the content of fileobj gzip-compressed under its SHA-256 digest
+    and returns the digest.
+
+    Identical content is written once: if the digest is already known and
+    stored, nothing is written at all; otherwise the blob is streamed to a
+    temp file and renamed into place only if no copy exists yet.
+    """
+    if digest and has_blob(digest):
+        _touch(blob_path(digest))
+        return digest
+
+    os.makedirs(BLOB_STORE_DIR, exist_ok=True)
+
+    sha = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=BLOB_STORE_DIR, suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+                for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+                    sha.update(chunk)
+                    gz.write(chunk)
+
+        digest = sha.hexdigest()
+        path = blob_path(digest)
+
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            _touch(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return digest
+
+
+def _touch(path: str):
+    # mtime doubles as "last stored" time for the retention policy
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+# -----------------------------
+# Streaming Reads
+# -----------------------------
+
+def open_blob(digest: str):
+    """
+    Opens a stored blob as a decompressing binary stream.
+    """
+    path = blob_path(digest)
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Blob {digest} is not in the store.")
+
+    return gzip.open(path, "rb")
+
+
+def iter_blob(digest: str, chunk_size: int = CHUNK_SIZE):
+    with open_blob(digest) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+
+# -----------------------------
+# Garbage Collection
+# -----------------------------
+
+def collect_garbage(retention_days: float = BLOB_RETENTION_DAYS,
+                    quota_bytes: int = BLOB_STORE_QUOTA_BYTES,
+                    protected=()):
+    """
+    Deletes blobs not stored within the retention window, then evicts the
+    oldest blobs until the store fits in the disk quota. Digests in
+    `protected` (e.g. tasks still processing) are never deleted.
+    """
+    if not os.path.isdir(BLOB_STORE_DIR):
+        return {"deleted": 0, "freed_bytes": 0, "total_bytes": 0}
+
+    now = time.time()
+    cutoff = now - retention_days * 86400
+    protected = set(protected)
+
+    blobs = []
+    deleted = 0
+    freed = 0
+
+    for root, _, files in os.walk(BLOB_STORE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            # Partial writes from store_blob() live in the store root
+            if name.endswith(".tmp") and root == BLOB_STORE_DIR:
+                if stat.st_mtime < now - STALE_TEMP_SECONDS:
+                    os.remove(path)
+                continue
+
+            # Only files laid out by blob_path() are blobs; leave anything else
+            if not name.endswith(".gz") or os.path.dirname(root) != BLOB_STORE_DIR:
+                continue
+
+            digest = os.path.basename(root) + name[:-len(".gz")]
+            blobs.append((stat.st_mtime, stat.st_size, digest, path))
+
+    total = sum(size for _, size, _, _ in blobs)
+
+    # Oldest first, so quota eviction drops the least recently stored blobs
+    blobs.sort()
+
+    for mtime, size, digest, path in blobs:
+        if digest in protected:
+            continue
+
+        if mtime >= cutoff and total <= quota_bytes:
+            continue
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+
+        deleted += 1
+        freed += size
+        total -= size
+
+    return {"deleted": deleted, "freed_bytes": freed, "total_bytes": total}
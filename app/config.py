@@ -15,4 +15,34 @@ DB_PATH = f"sqlite:///{DB_FILE}"
 
 MATCH_THRESHOLD_SHORTLIST = 0.85
 MATCH_THRESHOLD_REVIEW = 0.6
-MIN_EXPERIENCE = 3
\ No newline at end of file
+MIN_EXPERIENCE = 3
+MIN_EXTRACTION_CONFIDENCE = 0.75
+
+JOB_DESCRIPTION_PATH = BASE_DIR / "data" / "job_description.txt"
+HIRING_POLICY_PATH = BASE_DIR / "data" / "hiring_policy.txt"
+
+# Seconds between checks for edited RAG documents (0 disables the watcher)
+DOCUMENT_WATCH_INTERVAL = float(os.getenv("DOCUMENT_WATCH_INTERVAL", "0"))
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Content-addressed store for uploaded resumes
+BLOB_STORE_DIR = str(BASE_DIR / "blob_store")
+BLOB_RETENTION_DAYS = float(os.getenv("BLOB_RETENTION_DAYS", "90"))
+BLOB_STORE_QUOTA_BYTES = int(os.getenv("BLOB_STORE_QUOTA_BYTES", str(1024 ** 3)))
+BLOB_GC_INTERVAL = float(os.getenv("BLOB_GC_INTERVAL", "3600"))
+
+# Upload limits
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "20"))
+
+# Resume pipeline stages
+PIPELINE_PROCESS_WORKERS = int(os.getenv("PIPELINE_PROCESS_WORKERS", "2"))
+STAGE_TIMEOUTS = {
+    "parse": 30,
+    "extract": 120,
+    "retrieve": 15,
+    "required_skills": 60,
+    "match": 5,
+    "route": 5
+}
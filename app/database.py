@@ -1,4 +1,5 @@
 import os
+import re
 import json
 import uuid
 from datetime import datetime
@@ -10,9 +11,15 @@ from sqlalchemy import (
     String,
     Float,
     DateTime,
-    Text
+    Text,
+    inspect,
+    text
 )
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.types import TypeDecorator
+
+from app.encoding import encode_json, decode_json, is_encoded
 
 
 # ==========================================
@@ -40,6 +47,28 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+# ==========================================
+# Encoded JSON Columns
+# ==========================================
+
+class EncodedJSON(TypeDecorator):
+    """
+    JSON value stored in the compact binary format of app/encoding.py.
+
+    Declared as TEXT so existing databases need no schema change; SQLite
+    keeps the encoded bytes as BLOBs in the same column, and legacy
+    json.dumps text still decodes.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_json(value)
+
+    def process_result_value(self, value, dialect):
+        return decode_json(value)
+
+
 # ==========================================
 # Candidate Table
 # ==========================================
@@ -57,11 +86,22 @@ class CandidateRecord(Base):
     recommendation = Column(String)
     review_reason = Column(String)
 
-    extracted_data = Column(Text)
-    reasoning_logs = Column(Text)
+    # Uploaded resume in the blob store (see app/blob_store.py)
+    resume_hash = Column(String, index=True)
+    resume_filename = Column(String)
+    resume_size = Column(Integer)
+
+    extracted_data = Column(EncodedJSON)
+    reasoning_logs = Column(EncodedJSON)
+
+    # Failure message (may include raw LLM output) for failed tasks
+    error_message = Column(Text)
 
     processing_time_ms = Column(Float)
 
+    # Version of the RAG documents the candidate was scored against
+    document_version = Column(String)
+
     status = Column(String)
 
     created_at = Column(DateTime)
@@ -74,19 +114,285 @@ class CandidateRecord(Base):
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    migrate_encoded_columns()
+    _init_search_index()
+
+
+def _add_missing_columns():
+    """
+    create_all() never alters existing tables, so columns added to
+    CandidateRecord after the database was created are added here.
+    """
+    table = CandidateRecord.__table__
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+            ))
+
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+# ==========================================
+# MIGRATION: JSON TEXT -> ENCODED JSON
+# ==========================================
+
+MIGRATION_CHUNK_SIZE = 500
+
+
+def _migrate_row(row):
+    extracted_data = row.extracted_data
+    reasoning_logs = row.reasoning_logs
+    error_message = None
+
+    if extracted_data is not None and not is_encoded(extracted_data):
+        extracted_data = encode_json(decode_json(extracted_data))
+
+    if reasoning_logs is not None and not is_encoded(reasoning_logs):
+        try:
+            reasoning_logs = encode_json(json.loads(reasoning_logs))
+        except ValueError:
+            # Failure messages used to be written into reasoning_logs
+            error_message = reasoning_logs
+            reasoning_logs = None
+
+    return {
+        "id": row.id,
+        "extracted_data": extracted_data,
+        "reasoning_logs": reasoning_logs,
+        "error_message": error_message
+    }
+
+
+def migrate_encoded_columns(chunk_size: int = MIGRATION_CHUNK_SIZE):
+    """
+    Converts rows still holding json.dumps text to the encoded format,
+    one transaction per chunk. Safe to re-run; returns the number of
+    converted rows.
+    """
+    converted = 0
+    last_id = 0
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text("""
+                SELECT id, extracted_data, reasoning_logs
+                FROM candidates
+                WHERE id > :last_id
+                  AND (typeof(extracted_data) = 'text'
+                       OR typeof(reasoning_logs) = 'text')
+                ORDER BY id
+                LIMIT :limit
+            """), {"last_id": last_id, "limit": chunk_size}).fetchall()
+
+            if not rows:
+                break
+
+            conn.execute(text("""
+                UPDATE candidates
+                SET extracted_data = :extracted_data,
+                    reasoning_logs = :reasoning_logs,
+                    error_message = COALESCE(error_message, :error_message)
+                WHERE id = :id
+            """), [_migrate_row(row) for row in rows])
+
+            converted += len(rows)
+            last_id = rows[-1].id
+
+    if converted:
+        # Return the space freed by the smaller rows to the filesystem
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql("VACUUM")
+
+    return converted
+
+
+# ==========================================
+# FULL-TEXT SEARCH (SQLite FTS5)
+# ==========================================
+
+# rowid of each entry is the candidates.id it indexes
+SEARCH_TABLE = "candidate_search"
+
+# bm25 weights, in column order: matches in skills/roles rank above body text
+SEARCH_WEIGHTS = "10.0, 2.0, 8.0, 5.0, 3.0, 1.0"
+
+
+def _init_search_index():
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+            {"name": SEARCH_TABLE}
+        ).first()
+
+        if exists:
+            return
+
+        conn.execute(text(f"""
+            CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+                name, email, skills, roles, education, resume_text,
+                tokenize = 'porter unicode61',
+                prefix = '2 3'
+            )
+        """))
+
+        # Backfill existing candidates (their resume text was never stored)
+        rows = conn.execute(text(
+            "SELECT id, name, email, extracted_data FROM candidates "
+            "WHERE status = 'completed'"
+        )).fetchall()
+
+        for row in rows:
+            extracted_data = decode_json(row.extracted_data)
+
+            if not isinstance(extracted_data, dict):
+                extracted_data = {}
+
+            _index_candidate(
+                conn, row.id, row.name, row.email, extracted_data, ""
+            )
+
+
+def _index_candidate(conn, record_id, name, email, extracted_data, resume_text):
+    roles = [
+        " ".join(filter(None, [r.get("role"), r.get("company")]))
+        for r in extracted_data.get("previous_roles", [])
+    ]
+    education = [
+        " ".join(filter(None, [e.get("degree"), e.get("institution")]))
+        for e in extracted_data.get("education", [])
+    ]
+
+    conn.execute(
+        text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"),
+        {"id": record_id}
+    )
+    conn.execute(
+        text(f"""
+            INSERT INTO {SEARCH_TABLE}
+                (rowid, name, email, skills, roles, education, resume_text)
+            VALUES
+                (:id, :name, :email, :skills, :roles, :education, :resume_text)
+        """),
+        {
+            "id": record_id,
+            "name": name or "",
+            "email": email or "",
+            "skills": ", ".join(extracted_data.get("skills", [])),
+            "roles": "\n".join(roles),
+            "education": "\n".join(education),
+            "resume_text": resume_text or ""
+        }
+    )
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turns free-text input into a safe FTS5 MATCH expression.
+
+    Every term is quoted, so keywords like c++ or node.js never reach the
+    FTS5 query parser as syntax. Only "double-quoted phrases" and a
+    trailing * (prefix search) are passed through.
+    """
+    terms = []
+
+    for match in re.finditer(r'"([^"]*)"?|(\S+)', query):
+        phrase, word = match.group(1), match.group(2)
+
+        if phrase is not None:
+            if phrase.strip():
+                terms.append('"' + phrase.strip() + '"')
+            continue
+
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', "")
+
+        if word:
+            terms.append('"' + word + '"' + ("*" if prefix else ""))
+
+    if not terms:
+        raise ValueError("Search query is empty.")
+
+    return " ".join(terms)
+
+
+def search_candidates(
+    query: str,
+    recommendation: str = None,
+    status: str = None,
+    limit: int = 20
+):
+    """
+    BM25-ranked FTS5 search over all terms, e.g. python aws,
+    "machine learning" or pyth*. Raises ValueError for empty queries.
+    """
+    filters = ""
+    params = {"query": build_match_query(query), "limit": limit}
+
+    if recommendation:
+        filters += " AND c.recommendation = :recommendation"
+        params["recommendation"] = recommendation
+
+    if status:
+        filters += " AND c.status = :status"
+        params["status"] = status
+
+    # CROSS JOIN keeps the FTS index as the outer loop, so candidates is
+    # only ever read by primary key for matching rows
+    sql = text(f"""
+        SELECT
+            c.task_id,
+            c.name,
+            c.email,
+            c.match_score,
+            c.recommendation,
+            c.status,
+            snippet({SEARCH_TABLE}, -1, '<b>', '</b>', '...', 12) AS snippet,
+            bm25({SEARCH_TABLE}, {SEARCH_WEIGHTS}) AS rank
+        FROM {SEARCH_TABLE}
+        CROSS JOIN candidates c ON c.id = {SEARCH_TABLE}.rowid
+        WHERE {SEARCH_TABLE} MATCH :query{filters}
+        ORDER BY rank
+        LIMIT :limit
+    """)
+
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(sql, params).mappings().all()
+    except OperationalError as e:
+        raise ValueError(f"Invalid search query: {e.orig}")
+
+    return [dict(row) for row in rows]
 
 
 # ==========================================
 # TASK LIFECYCLE
 # ==========================================
 
-def create_task(source: str):
+def create_task(
+    source: str,
+    resume_hash: str = None,
+    resume_filename: str = None,
+    resume_size: int = None
+):
     db = SessionLocal()
 
     task_id = str(uuid.uuid4())
 
     task = CandidateRecord(
         task_id=task_id,
+        resume_hash=resume_hash,
+        resume_filename=resume_filename,
+        resume_size=resume_size,
         status="processing",
         created_at=datetime.utcnow()
     )
@@ -107,7 +413,7 @@ def update_task_failure(task_id: str, error_message: str):
 
     if record:
         record.status = "failed"
-        record.reasoning_logs = error_message
+        record.error_message = error_message
         record.completed_at = datetime.utcnow()
         db.commit()
 
@@ -123,7 +429,9 @@ def complete_task(
     review_reason,
     extracted_data,
     reasoning_logs,
-    processing_time_ms
+    processing_time_ms,
+    document_version=None,
+    resume_text=None
 ):
     db = SessionLocal()
 
@@ -137,12 +445,18 @@ def complete_task(
         record.match_score = match_score
         record.recommendation = recommendation
         record.review_reason = review_reason
-        record.extracted_data = json.dumps(extracted_data)
-        record.reasoning_logs = json.dumps(reasoning_logs)
+        record.extracted_data = extracted_data
+        record.reasoning_logs = reasoning_logs
         record.processing_time_ms = processing_time_ms
+        record.document_version = document_version
         record.status = "completed"
         record.completed_at = datetime.utcnow()
 
+        # Search index is updated in the same transaction as the record
+        _index_candidate(
+            db, record.id, name, email, extracted_data, resume_text
+        )
+
         db.commit()
 
     db.close()
@@ -157,3 +471,15 @@ def get_task(task_id: str):
 
     db.close()
     return record
+
+
+def get_processing_resume_hashes():
+    db = SessionLocal()
+
+    rows = db.query(CandidateRecord.resume_hash).filter(
+        CandidateRecord.status == "processing",
+        CandidateRecord.resume_hash.isnot(None)
+    ).distinct().all()
+
+    db.close()
+    return {row[0] for row in rows}
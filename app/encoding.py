@@ -0,0 +1,120 @@
+import json
+import zlib
+from datetime import date, datetime, time
+
+# Both are in requirements.txt; the fallbacks only keep a partial install
+# working (zstd rows still need zstandard to be read back)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# -----------------------------
+# Format
+# -----------------------------
+# Encoded values are bytes: <version byte><codec byte><payload>.
+# JSON text never starts with a control character, so legacy
+# json.dumps() rows are told apart by the first byte.
+
+FORMAT_VERSION = 1
+
+CODEC_JSON = b"j"
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+
+# Smaller payloads are stored uncompressed
+COMPRESS_MIN_BYTES = 512
+
+
+def _default(value):
+    # Mirrors what orjson serializes natively (OPT_SERIALIZE_NUMPY included)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        value, separators=(",", ":"), ensure_ascii=False, default=_default
+    ).encode("utf-8")
+
+
+def _loads(payload):
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _compress(payload: bytes):
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=3).compress(payload)
+    return CODEC_ZLIB, zlib.compress(payload, 6)
+
+
+# -----------------------------
+# Encode / Decode
+# -----------------------------
+
+def encode_json(value) -> bytes:
+    if value is None:
+        return None
+
+    codec, payload = CODEC_JSON, _dumps(value)
+
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        compressed_codec, compressed = _compress(payload)
+        if len(compressed) < len(payload):
+            codec, payload = compressed_codec, compressed
+
+    return bytes([FORMAT_VERSION]) + codec + payload
+
+
+def is_encoded(value) -> bool:
+    return isinstance(value, (bytes, memoryview)) and len(value) >= 2 \
+        and value[0] == FORMAT_VERSION
+
+
+def decode_json(value):
+    """
+    Decodes an encoded value. Legacy rows (json.dumps text) are parsed as
+    JSON; text that is not JSON is returned unchanged.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, memoryview):
+        value = bytes(value)
+
+    if is_encoded(value):
+        codec, payload = value[1:2], value[2:]
+
+        if codec == CODEC_ZLIB:
+            payload = zlib.decompress(payload)
+        elif codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError(
+                    "zstandard is required to decode this value "
+                    "(pip install -r requirements.txt)."
+                )
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif codec != CODEC_JSON:
+            raise ValueError(f"Unknown encoding codec: {codec!r}")
+
+        return _loads(payload)
+
+    try:
+        return _loads(value)
+    except ValueError:
+        if isinstance(value, bytes):
+            return value.decode("utf-8", errors="replace")
+        return value
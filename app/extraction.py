@@ -1,8 +1,10 @@
 import os
 import json
-import re
+from typing import get_origin, get_type_hints
 from openai import OpenAI
+from app.config import STAGE_TIMEOUTS
 from app.schemas import CandidateExtraction
+from app.json_stream import IncrementalJSONParser, UnrecoverableJSONError
 
 
 # -----------------------------
@@ -11,34 +13,13 @@ from app.schemas import CandidateExtraction
 client = OpenAI(
     api_key=os.getenv("OPENROUTER_API_KEY"),
     base_url="https://openrouter.ai/api/v1",
+    # Never wait on a request longer than the extract stage allows
+    timeout=STAGE_TIMEOUTS["extract"],
 )
 
 MODEL_NAME = "meta-llama/llama-3.1-8b-instruct"
 
 
-# -----------------------------
-# Utility: Clean Model Output
-# -----------------------------
-def clean_model_output(text: str) -> str:
-    """
-    Cleans common LLM formatting issues:
-    - Removes markdown fences
-    - Extracts first JSON object
-    """
-    text = text.strip()
-
-    # Remove markdown fences if present
-    text = re.sub(r"```json|```", "", text).strip()
-
-    # Extract first valid JSON block
-    start = text.find("{")
-    end = text.rfind("}")
-
-    if start == -1 or end == -1:
-        raise ValueError("No JSON object found in model output.")
-
-    return text[start:end + 1]
-
 def normalize_extraction_schema(data: dict) -> dict:
     """
     Normalizes model output to match CandidateExtraction schema.
@@ -72,13 +53,99 @@ def normalize_extraction_schema(data: dict) -> dict:
 
     return data
 
+
+# -----------------------------
+# Streaming Validation
+# -----------------------------
+FIELD_TYPES = get_type_hints(CandidateExtraction)
+
+
+class ExtractionCancelled(Exception):
+    pass
+
+
+def _check_cancelled(cancel_event) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise ExtractionCancelled("Extraction was cancelled.")
+
+
+def validate_member(key: str, value) -> None:
+    """
+    Checks a completed top-level member against CandidateExtraction.
+
+    Only structural mismatches are fatal; scalar coercion (e.g. "5" for
+    years_of_experience) is left to Pydantic.
+    """
+    expected = FIELD_TYPES.get(key)
+
+    if expected is None:
+        return
+
+    if get_origin(expected) is list:
+        if not isinstance(value, list):
+            raise UnrecoverableJSONError(f"'{key}' must be a JSON array.")
+
+    elif isinstance(value, (list, dict)):
+        raise UnrecoverableJSONError(f"'{key}' must be a scalar value.")
+
+
+def stream_completion_json(messages, cancel_event=None) -> tuple:
+    """
+    Streams a completion through the incremental parser.
+
+    Stops reading as soon as the root object closes and aborts on
+    unrecoverable structure or once cancel_event is set. Returns
+    (json_text, raw_output); if the stream ends early, json_text is cut
+    back to the last complete member.
+    """
+    parser = IncrementalJSONParser(on_member=validate_member)
+    raw_output = ""
+
+    _check_cancelled(cancel_event)
+
+    stream = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=messages,
+        temperature=0.1,
+        stream=True,
+    )
+
+    try:
+        for chunk in stream:
+            # Closing the stream below stops generation on the provider
+            _check_cancelled(cancel_event)
+
+            if not chunk.choices:
+                continue
+
+            delta = chunk.choices[0].delta.content or ""
+            raw_output += delta
+
+            try:
+                if parser.feed(delta):
+                    break
+            except UnrecoverableJSONError as e:
+                # Keep what was generated for the correction prompt
+                e.raw_output = raw_output
+                raise
+    finally:
+        stream.close()
+
+    if not raw_output:
+        raise ValueError("Model returned empty response.")
+
+    return parser.result(), raw_output
+
+
 # -----------------------------
 # Main Extraction Function
 # -----------------------------
-def extract_candidate_data(resume_text: str) -> CandidateExtraction:
+def extract_candidate_data(resume_text: str,
+                           cancel_event=None) -> CandidateExtraction:
     """
     Extracts structured candidate data from resume text using LLM.
-    Includes retry with JSON correction logic.
+    Output is validated while streaming; includes retry with JSON
+    correction logic. Setting cancel_event stops it without a retry.
     """
 
     base_prompt = f"""
@@ -112,31 +179,20 @@ Resume:
 """
 
     raw_output = ""
+    prompt = base_prompt
 
     for attempt in range(2):
         try:
-            response = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Return ONLY strict valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": base_prompt
-                    }
-                ],
-                temperature=0.1,
-            )
-
-            raw_output = response.choices[0].message.content
-
-            if not raw_output:
-                raise ValueError("Model returned empty response.")
-
-            # Clean output
-            cleaned_output = clean_model_output(raw_output)
+            cleaned_output, raw_output = stream_completion_json([
+                {
+                    "role": "system",
+                    "content": "Return ONLY strict valid JSON."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ], cancel_event=cancel_event)
 
             # Parse JSON
             data = json.loads(cleaned_output)
@@ -145,10 +201,19 @@ Resume:
             # Validate using Pydantic schema
             return CandidateExtraction(**data)
 
+        except ExtractionCancelled:
+            raise
+
         except Exception as e:
-            if attempt == 0:
+            raw_output = getattr(e, "raw_output", raw_output)
+
+            if attempt == 0 and isinstance(e, UnrecoverableJSONError):
+                # Stream was aborted mid-generation: the partial output has
+                # nothing worth correcting, so ask again from the resume
+                prompt = base_prompt
+            elif attempt == 0:
                 # Retry with correction prompt
-                base_prompt = f"""
+                prompt = f"""
 The previous output was invalid JSON.
 
 Fix it and return ONLY strict valid JSON.
@@ -0,0 +1,160 @@
+import json
+
+
+# Prose allowed before the opening "{" (markdown fences, "Here is...")
+MAX_PREAMBLE_CHARS = 2000
+
+CLOSING = {"}": "{", "]": "["}
+
+
+class UnrecoverableJSONError(ValueError):
+    pass
+
+
+class IncrementalJSONParser:
+    """
+    Tracks the structure of a JSON object while it is being streamed.
+
+    - Skips any preamble before the first "{"
+    - Raises UnrecoverableJSONError as soon as brackets are mismatched
+    - Calls on_member(key, value) for every completed top-level member,
+      so callers can reject a bad generation before it finishes
+    - Reports completion once the root object closes
+    """
+
+    def __init__(self, on_member=None):
+        self.on_member = on_member
+
+        self.buffer = []
+        self.preamble = 0
+        self.started = False
+        self.complete = False
+
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+
+        # Top-level member being read
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+
+        # Offset of the end of the last complete top-level member
+        self._last_member_end = None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Consumes a chunk of model output. Returns True once the root
+        object is closed and the rest of the stream can be dropped.
+        """
+        for char in chunk:
+            if self.complete:
+                break
+
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self._stack.append("{")
+                    self.buffer.append(char)
+                    self._last_member_end = 1
+                else:
+                    self.preamble += 1
+                    if self.preamble > MAX_PREAMBLE_CHARS:
+                        raise UnrecoverableJSONError(
+                            "No JSON object found in model output."
+                        )
+                continue
+
+            self.buffer.append(char)
+            self._consume(char, len(self.buffer) - 1)
+
+        return self.complete
+
+    def _consume(self, char: str, pos: int):
+        depth = len(self._stack)
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if depth == 1 and self._key_start is not None:
+                    raw_key = "".join(self.buffer[self._key_start:pos + 1])
+                    self._key_start = None
+                    try:
+                        self._key = json.loads(raw_key)
+                    except ValueError:
+                        raise UnrecoverableJSONError(
+                            f"Invalid key in model output: {raw_key[:80]}"
+                        )
+            return
+
+        if char == '"':
+            self._in_string = True
+            if depth == 1 and self._value_start is None:
+                self._key_start = pos
+
+        elif char in "{[":
+            self._stack.append(char)
+
+        elif char in "}]":
+            if not self._stack or self._stack[-1] != CLOSING[char]:
+                raise UnrecoverableJSONError(
+                    f"Mismatched '{char}' at offset {pos} of model output."
+                )
+
+            if depth == 1:
+                self._end_member(pos)
+                self.complete = True
+
+            self._stack.pop()
+
+        elif char == ":" and depth == 1:
+            if self._key is None:
+                raise UnrecoverableJSONError(
+                    f"Value without a key at offset {pos} of model output."
+                )
+            self._value_start = pos + 1
+
+        elif char == "," and depth == 1:
+            self._end_member(pos)
+
+    def _end_member(self, pos: int):
+        if self._value_start is None:
+            return
+
+        raw_value = "".join(self.buffer[self._value_start:pos]).strip()
+        key = self._key
+
+        self._key = None
+        self._value_start = None
+
+        try:
+            value = json.loads(raw_value)
+        except ValueError:
+            raise UnrecoverableJSONError(
+                f"Invalid value for '{key}' in model output: {raw_value[:80]}"
+            )
+
+        if self.on_member:
+            self.on_member(key, value)
+
+        self._last_member_end = pos
+
+    def text(self) -> str:
+        return "".join(self.buffer)
+
+    def result(self) -> str:
+        """
+        The parsed JSON text. If the stream stopped before the root object
+        closed, the object is cut back to its last complete member.
+        """
+        if not self.started:
+            raise ValueError("No JSON object found in model output.")
+
+        if self.complete:
+            return self.text()
+
+        return "".join(self.buffer[:self._last_member_end]) + "}"
@@ -1,7 +1,8 @@
-import os
 import time
 import asyncio
-import json
+import logging
+from functools import partial
+from urllib.parse import quote
 
 from fastapi import FastAPI, UploadFile, File, Request, Header, HTTPException
 from fastapi.responses import HTMLResponse, StreamingResponse
@@ -10,22 +11,47 @@ from fastapi.templating import Jinja2Templates
 from io import StringIO
 import csv
 
-from app.pdf_parser import extract_text_from_pdf
+from app.pdf_parser import extract_text_from_blob
+from app.blob_store import iter_blob, has_blob, collect_garbage
+from app.uploads import (
+    UploadSizeLimitMiddleware,
+    MULTIPART_OVERHEAD_BYTES,
+    receive_upload,
+    store_upload
+)
 from app.extraction import extract_candidate_data
 from app.rag import (
-    build_vector_store,
-    retrieve_context,
-    extract_required_skills_from_context
+    get_knowledge,
+    reload_knowledge,
+    knowledge_is_stale
 )
 from app.matcher import compute_match
 from app.router import route_candidate
-from app.config import MIN_EXPERIENCE
+from app.rescoring import rescore_candidates, RESCORE_DIFF_LIMIT
+from app.pipeline import (
+    Stage,
+    run_pipeline,
+    start_pipeline,
+    shutdown_pipeline
+)
+from app.config import (
+    MIN_EXPERIENCE,
+    MATCH_THRESHOLD_SHORTLIST,
+    MATCH_THRESHOLD_REVIEW,
+    DOCUMENT_WATCH_INTERVAL,
+    BLOB_GC_INTERVAL,
+    MAX_UPLOAD_BYTES,
+    STAGE_TIMEOUTS,
+    ADMIN_TOKEN
+)
 from app.database import (
     init_db,
     create_task,
     complete_task,
     update_task_failure,
-    get_task
+    get_task,
+    get_processing_resume_hashes,
+    search_candidates
 )
 from app.database import get_task as get_task_from_db
 # -----------------------------------
@@ -33,22 +59,76 @@ from app.database import get_task as get_task_from_db
 # -----------------------------------
 
 app = FastAPI()
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    paths=["/webhook/resume"],
+    max_bytes=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+)
 templates = Jinja2Templates(directory="app/templates")
 
+logger = logging.getLogger(__name__)
+
 init_db()
 
 # -----------------------------------
 # Load RAG Documents at Startup
 # -----------------------------------
 
-with open("data/job_description.txt") as f:
-    job_doc = f.read()
+reload_knowledge(force=True)
+
+
+async def watch_documents(interval: float):
+    """
+    Polls the RAG documents and hot-swaps the knowledge snapshot on change.
+    """
+    while True:
+        await asyncio.sleep(interval)
 
-with open("data/hiring_policy.txt") as f:
-    policy_doc = f.read()
+        try:
+            if knowledge_is_stale():
+                await asyncio.to_thread(reload_knowledge)
+        except Exception:
+            logger.exception("Document reload failed")
+
+
+@app.on_event("startup")
+async def start_document_watcher():
+    if DOCUMENT_WATCH_INTERVAL > 0:
+        asyncio.create_task(watch_documents(DOCUMENT_WATCH_INTERVAL))
+
+
+# -----------------------------------
+# Resume Blob Store GC
+# -----------------------------------
 
-documents = [job_doc, policy_doc]
-build_vector_store(documents)
+def run_blob_gc():
+    return collect_garbage(protected=get_processing_resume_hashes())
+
+
+async def blob_gc_loop(interval: float):
+    while True:
+        try:
+            await asyncio.to_thread(run_blob_gc)
+        except Exception:
+            logger.exception("Blob store GC failed")
+
+        await asyncio.sleep(interval)
+
+
+@app.on_event("startup")
+async def start_blob_gc():
+    if BLOB_GC_INTERVAL > 0:
+        asyncio.create_task(blob_gc_loop(BLOB_GC_INTERVAL))
+
+
+@app.on_event("startup")
+async def start_pipeline_workers():
+    start_pipeline()
+
+
+@app.on_event("shutdown")
+def stop_pipeline_workers():
+    shutdown_pipeline()
 
 
 # ===================================
@@ -58,14 +138,20 @@ build_vector_store(documents)
 @app.post("/webhook/resume")
 async def resume_webhook(file: UploadFile = File(...), source: str = "external"):
 
-    task_id = create_task(source)
+    # Size-check and validate the file BEFORE leaving request lifecycle;
+    # only its blob store digest is handed to the background task
+    upload = await receive_upload(file)
+    resume_hash = await store_upload(upload)
 
-    # Read file BEFORE leaving request lifecycle
-    file_bytes = await file.read()
-    filename = file.filename
+    task_id = create_task(
+        source,
+        resume_hash=resume_hash,
+        resume_filename=upload.filename,
+        resume_size=upload.size
+    )
 
     asyncio.create_task(
-        process_resume(task_id, file_bytes, filename)
+        process_resume(task_id, resume_hash)
     )
 
     return {
@@ -78,36 +164,69 @@ async def resume_webhook(file: UploadFile = File(...), source: str = "external")
 # BACKGROUND PROCESSOR
 # ===================================
 
-async def process_resume(task_id: str, file_bytes: bytes, filename: str):
+async def process_resume(task_id: str, resume_hash: str):
 
     start_time = time.time()
 
-    try:
-        os.makedirs("temp", exist_ok=True)
-
-        file_path = f"temp/{task_id}_{filename}"
+    # Pin the document version for the whole task; reloads swap in a new
+    # snapshot without affecting tasks that already started
+    knowledge = get_knowledge()
 
-        with open(file_path, "wb") as f:
-            f.write(file_bytes)
-
-        # Extract resume text
-        resume_text = extract_text_from_pdf(file_path)
-
-        # Structured extraction
-        candidate = extract_candidate_data(resume_text)
-
-        # RAG retrieval
-        context_docs = retrieve_context("required skills", documents)
-        combined_context = "\n".join(context_docs)
-        required_skills = extract_required_skills_from_context(combined_context)
-
-        # Matching logic
-        match = compute_match(candidate, required_skills, MIN_EXPERIENCE)
+    try:
+        # Stage graph: the resume branch (parse -> extract) and the document
+        # branch (retrieve -> required_skills) run concurrently
+        results = await run_pipeline([
+            Stage(
+                "parse",
+                partial(extract_text_from_blob, resume_hash),
+                executor="process",
+                timeout=STAGE_TIMEOUTS["parse"]
+            ),
+            Stage(
+                "extract",
+                extract_candidate_data,
+                deps=["parse"],
+                executor="thread",
+                timeout=STAGE_TIMEOUTS["extract"],
+                cancellable=True
+            ),
+            Stage(
+                "retrieve",
+                partial(knowledge.retrieve, "required skills"),
+                executor="thread",
+                timeout=STAGE_TIMEOUTS["retrieve"]
+            ),
+            Stage(
+                "required_skills",
+                knowledge.required_skills,
+                deps=["retrieve"],
+                executor="thread",
+                timeout=STAGE_TIMEOUTS["required_skills"]
+            ),
+            Stage(
+                "match",
+                lambda candidate, skills: compute_match(
+                    candidate, skills, MIN_EXPERIENCE
+                ),
+                deps=["extract", "required_skills"],
+                executor="async",
+                timeout=STAGE_TIMEOUTS["match"]
+            ),
+            Stage(
+                "route",
+                lambda match, candidate: route_candidate(
+                    match, candidate.extraction_confidence
+                ),
+                deps=["match", "extract"],
+                executor="async",
+                timeout=STAGE_TIMEOUTS["route"]
+            )
+        ])
 
-        final_result = route_candidate(
-            match,
-            candidate.extraction_confidence
-        )
+        resume_text = results["parse"]
+        candidate = results["extract"]
+        required_skills = results["required_skills"]
+        final_result = results["route"]
 
         processing_time_ms = round((time.time() - start_time) * 1000, 2)
 
@@ -117,7 +236,8 @@ async def process_resume(task_id: str, file_bytes: bytes, filename: str):
             "match_score": final_result.match_score,
             "missing_skills": final_result.critical_skills_missing,
             "confidence": candidate.extraction_confidence,
-            "recommendation": final_result.recommendation
+            "recommendation": final_result.recommendation,
+            "document_version": knowledge.version
         }
 
         # ✅ COMPLETE TASK (Correct Call)
@@ -130,54 +250,219 @@ async def process_resume(task_id: str, file_bytes: bytes, filename: str):
             review_reason=getattr(final_result, "review_reason", ""),
             extracted_data=candidate.dict(),
             reasoning_logs=reasoning_logs,
-            processing_time_ms=processing_time_ms
+            processing_time_ms=processing_time_ms,
+            document_version=knowledge.version,
+            resume_text=resume_text
         )
 
     except Exception as e:
         update_task_failure(task_id, str(e))
 
 # ===================================
-# TASK STATUS POLLING
+# RESUME DOWNLOAD / RE-PROCESSING
 # ===================================
 
-@app.get("/tasks/{task_id}")
-def get_task_status(task_id: str):
+def get_stored_resume(task_id: str):
 
     task = get_task(task_id)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    # Parse stored JSON fields safely
-    extracted_data = None
-    reasoning_logs = None
+    if not task.resume_hash or not has_blob(task.resume_hash):
+        raise HTTPException(status_code=410, detail="Resume file no longer retained")
 
-    try:
-        if task.extracted_data:
-            extracted_data = json.loads(task.extracted_data)
-    except:
-        extracted_data = task.extracted_data
+    return task
 
-    try:
-        if task.reasoning_logs:
-            reasoning_logs = json.loads(task.reasoning_logs)
-    except:
-        reasoning_logs = task.reasoning_logs
 
+def content_disposition(filename: str) -> str:
+    """
+    Attachment header for any filename (RFC 6266 / 5987): headers are
+    latin-1, so non-ASCII names go in filename* with an ASCII fallback.
+    """
+    fallback = "".join(
+        char if " " <= char <= "~" and char not in '"\\' else "_"
+        for char in filename
+    )
+
+    return (
+        f'attachment; filename="{fallback}"; '
+        f"filename*=UTF-8''{quote(filename, safe='')}"
+    )
+
+
+@app.get("/tasks/{task_id}/resume")
+def download_resume(task_id: str):
+
+    task = get_stored_resume(task_id)
+    filename = task.resume_filename or f"{task.task_id}.pdf"
+
+    return StreamingResponse(
+        iter_blob(task.resume_hash),
+        media_type="application/pdf",
+        headers={"Content-Disposition": content_disposition(filename)}
+    )
+
+
+@app.post("/tasks/{task_id}/reprocess")
+async def reprocess_resume(task_id: str, source: str = "reprocess"):
+
+    task = get_stored_resume(task_id)
+
+    new_task_id = create_task(
+        source,
+        resume_hash=task.resume_hash,
+        resume_filename=task.resume_filename,
+        resume_size=task.resume_size
+    )
+
+    asyncio.create_task(
+        process_resume(new_task_id, task.resume_hash)
+    )
+
+    return {
+        "task_id": new_task_id,
+        "status": "processing"
+    }
+
+
+# ===================================
+# ADMIN: RELOAD RAG DOCUMENTS
+# ===================================
+
+def check_admin_token(token: str):
+    # Fail closed: admin endpoints stay disabled until ADMIN_TOKEN is set
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/reload-documents")
+async def reload_documents(x_admin_token: str = Header(None)):
+
+    check_admin_token(x_admin_token)
+
+    snapshot, reloaded = await asyncio.to_thread(reload_knowledge)
+
+    return {
+        "document_version": snapshot.version,
+        "reloaded": reloaded
+    }
+
+
+# ===================================
+# ADMIN: BULK RE-SCORING
+# ===================================
+
+@app.post("/admin/rescore")
+async def rescore(
+    dry_run: bool = False,
+    min_experience: float = None,
+    shortlist_threshold: float = None,
+    review_threshold: float = None,
+    limit: int = RESCORE_DIFF_LIMIT,
+    x_admin_token: str = Header(None)
+):
+
+    check_admin_token(x_admin_token)
+
+    overrides = (min_experience, shortlist_threshold, review_threshold)
+
+    # Stored rows must follow the same rules as process_resume, so
+    # what-if thresholds are only allowed for a dry run
+    if not dry_run and any(value is not None for value in overrides):
+        raise HTTPException(
+            status_code=400,
+            detail="Threshold overrides are only allowed with dry_run=true"
+        )
+
+    knowledge = get_knowledge()
+    required_skills = await asyncio.to_thread(knowledge.required_skills)
+
+    return await asyncio.to_thread(
+        rescore_candidates,
+        required_skills,
+        min_experience=(
+            MIN_EXPERIENCE if min_experience is None else min_experience
+        ),
+        shortlist_threshold=(
+            MATCH_THRESHOLD_SHORTLIST if shortlist_threshold is None
+            else shortlist_threshold
+        ),
+        review_threshold=(
+            MATCH_THRESHOLD_REVIEW if review_threshold is None
+            else review_threshold
+        ),
+        document_version=knowledge.version,
+        dry_run=dry_run,
+        diff_limit=min(max(limit, 0), 1000)
+    )
+
+# ===================================
+# TASK STATUS POLLING
+# ===================================
+
+@app.get("/tasks/{task_id}")
+def get_task_status(task_id: str):
+
+    task = get_task(task_id)
+
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    # JSON fields are decoded by the EncodedJSON column type
     return {
         "task_id": task.task_id,
         "status": task.status,
         "processing_time_ms": task.processing_time_ms,
-        "extracted_data": extracted_data,
-        "reasoning_logs": reasoning_logs,
+        "extracted_data": task.extracted_data,
+        "reasoning_logs": task.reasoning_logs,
+        "error_message": task.error_message,
         "match_score": task.match_score,
         "recommendation": task.recommendation,
         "review_reason": task.review_reason,
+        "document_version": task.document_version,
+        "resume_hash": task.resume_hash,
+        "resume_filename": task.resume_filename,
         "created_at": task.created_at,
         "completed_at": task.completed_at
     }
 
 
+# ===================================
+# CANDIDATE SEARCH
+# ===================================
+
+@app.get("/search")
+def search(
+    q: str,
+    recommendation: str = None,
+    status: str = None,
+    limit: int = 20
+):
+
+    if recommendation == "All":
+        recommendation = None
+
+    try:
+        results = search_candidates(
+            q,
+            recommendation=recommendation,
+            status=status,
+            limit=min(max(limit, 1), 100)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "query": q,
+        "count": len(results),
+        "results": results
+    }
+
+
 # ===================================
 # DASHBOARD (UI)
 # ===================================
@@ -186,7 +471,6 @@ def get_task_status(task_id: str):
 def dashboard(request: Request, status: str = None):
 
     from app.database import SessionLocal, CandidateRecord
-    import json
 
     db = SessionLocal()
     query = db.query(CandidateRecord)
@@ -197,12 +481,9 @@ def dashboard(request: Request, status: str = None):
 
     records = query.order_by(CandidateRecord.created_at.desc()).all()
 
-    # Parse reasoning logs
+    # Reasoning logs (already decoded)
     for r in records:
-        try:
-            r.parsed_logs = json.loads(r.reasoning_logs) if r.reasoning_logs else {}
-        except:
-            r.parsed_logs = {}
+        r.parsed_logs = r.reasoning_logs if isinstance(r.reasoning_logs, dict) else {}
 
     db.close()
 
@@ -223,7 +504,6 @@ def dashboard(request: Request, status: str = None):
 from fastapi.responses import StreamingResponse
 from io import StringIO
 import csv
-import json
 
 
 @app.get("/export-csv")
@@ -260,13 +540,9 @@ def export_csv(status: str = None):
 
         # Extract missing skills from reasoning_logs
         missing_skills = ""
-        try:
-            if r.reasoning_logs:
-                logs = json.loads(r.reasoning_logs)
-                missing = logs.get("missing_skills", [])
-                missing_skills = ", ".join(missing)
-        except:
-            pass
+        if isinstance(r.reasoning_logs, dict):
+            missing = r.reasoning_logs.get("missing_skills", [])
+            missing_skills = ", ".join(missing)
 
         writer.writerow([
             r.task_id,
@@ -1,5 +1,14 @@
+import shutil
+import tempfile
+
 import pdfplumber
 
+from app.blob_store import open_blob
+
+
+# Resumes larger than this are decompressed to disk instead of memory
+SPOOL_MAX_BYTES = 4 * 1024 * 1024
+
 
 def extract_text_from_pdf(file_path: str) -> str:
     with pdfplumber.open(file_path) as pdf:
@@ -10,4 +19,13 @@ def extract_text_from_pdf(file_path: str) -> str:
     if not text.strip():
         raise ValueError("No extractable text found.")
 
-    return text
\ No newline at end of file
+    return text
+
+
+def extract_text_from_blob(digest: str) -> str:
+    # pdfplumber seeks around the file, so decompress into a seekable buffer
+    with open_blob(digest) as src, \
+            tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as buf:
+        shutil.copyfileobj(src, buf)
+        buf.seek(0)
+        return extract_text_from_pdf(buf)
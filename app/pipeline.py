@@ -0,0 +1,312 @@
+import asyncio
+import inspect
+import threading
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Sequence
+
+from app.config import PIPELINE_PROCESS_WORKERS
+
+
+EXECUTORS = ("async", "thread", "process")
+
+
+class Stage:
+    """
+    One node of the pipeline graph.
+
+    func receives the results of `deps`, in order, as positional args.
+    executor:
+    - "async": runs on the event loop (coroutine functions are awaited,
+      plain functions are called directly - keep those cheap)
+    - "thread": runs in the default thread pool (blocking I/O, LLM calls)
+    - "process": runs in a process pool (CPU-bound work); func and its
+      args must be picklable
+
+    cancellable thread stages also get a `cancel_event` keyword argument
+    (threading.Event), set when the stage times out or is cancelled; func
+    should check it regularly and stop.
+    """
+
+    def __init__(self,
+                 name: str,
+                 func: Callable,
+                 deps: Sequence[str] = (),
+                 executor: str = "thread",
+                 timeout: float = None,
+                 cancellable: bool = False):
+
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}' for stage '{name}'.")
+
+        if cancellable and executor != "thread":
+            raise ValueError(f"Only thread stages can be cancellable ('{name}').")
+
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.executor = executor
+        self.timeout = timeout
+        self.cancellable = cancellable
+
+
+class StageError(RuntimeError):
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Stage '{stage}' {message}")
+        self.stage = stage
+
+
+# -----------------------------
+# Process Workers
+# -----------------------------
+
+# Pause before retrying a worker that failed to start
+WORKER_RESTART_DELAY = 1.0
+
+class _WorkerPool:
+    """
+    PIPELINE_PROCESS_WORKERS single-process executors, each lent to one
+    stage at a time. A worker that crashes, times out or is cancelled is
+    killed and replaced without affecting stages running on the others.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle = None
+        self._workers = set()
+        self._starting = set()
+
+    def start(self):
+        if self._idle is not None:
+            return
+
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._spawn()
+
+    def _spawn(self):
+        task = asyncio.create_task(self._add_worker())
+        self._starting.add(task)
+        task.add_done_callback(self._starting.discard)
+
+    async def _add_worker(self):
+        idle = self._idle
+
+        while self._idle is idle:
+            # spawn: workers must not inherit the parent's model/thread state
+            worker = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            self._workers.add(worker)
+
+            # Only lend the worker out once its process is up, so spawn and
+            # import time are never charged to a stage's timeout
+            try:
+                await asyncio.wrap_future(worker.submit(int))
+            except Exception:
+                self._workers.discard(worker)
+                _kill_worker(worker)
+                await asyncio.sleep(WORKER_RESTART_DELAY)
+                continue
+
+            self.release(worker)
+            return
+
+    async def acquire(self) -> ProcessPoolExecutor:
+        self.start()
+        return await self._idle.get()
+
+    def release(self, worker: ProcessPoolExecutor):
+        # Workers from before a shutdown_pipeline() are not handed out again
+        if self._idle is not None and worker in self._workers:
+            self._idle.put_nowait(worker)
+
+    def replace(self, worker: ProcessPoolExecutor):
+        if worker not in self._workers:
+            return
+
+        self._workers.discard(worker)
+        _kill_worker(worker)
+
+        if self._idle is not None:
+            self._spawn()
+
+    def shutdown(self):
+        for task in self._starting:
+            task.cancel()
+
+        for worker in self._workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+
+        self._workers.clear()
+        self._idle = None
+
+
+def _kill_worker(worker: ProcessPoolExecutor):
+    # The executor cannot stop a running call, so kill its process directly
+    for process in list((worker._processes or {}).values()):
+        if process.is_alive():
+            process.kill()
+
+    worker.shutdown(wait=False, cancel_futures=True)
+
+
+_process_workers = _WorkerPool(PIPELINE_PROCESS_WORKERS)
+
+
+def start_pipeline():
+    """
+    Starts the process workers ahead of the first task. Must be called
+    from the running event loop.
+    """
+    _process_workers.start()
+
+
+def shutdown_pipeline():
+    _process_workers.shutdown()
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+
+def _topological_order(stages: List[Stage]) -> List[Stage]:
+    by_name = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage '{stage.name}'.")
+        by_name[stage.name] = stage
+
+    order = []
+    state = {}
+
+    def visit(stage, path):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Cycle in pipeline: {' -> '.join(path)}")
+
+        state[stage.name] = "visiting"
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown '{dep}'.")
+            visit(by_name[dep], path + [dep])
+
+        state[stage.name] = "done"
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage, [stage.name])
+
+    return order
+
+
+async def _call_stage(stage: Stage, args):
+    if stage.executor == "async":
+        result = stage.func(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    if not stage.cancellable:
+        return await asyncio.to_thread(stage.func, *args)
+
+    cancel_event = threading.Event()
+
+    try:
+        return await asyncio.to_thread(
+            partial(stage.func, *args, cancel_event=cancel_event)
+        )
+    except asyncio.CancelledError:
+        # Also raised by wait_for() on timeout; the thread itself cannot
+        # be interrupted, so ask it to stop
+        cancel_event.set()
+        raise
+
+
+async def _call_process_stage(stage: Stage, args):
+    worker = await _process_workers.acquire()
+
+    # The timeout starts once a worker is free, not while queued for one
+    future = asyncio.get_running_loop().run_in_executor(
+        worker, stage.func, *args
+    )
+
+    try:
+        result = await asyncio.wait_for(future, stage.timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError, BrokenProcessPool):
+        # The worker is hung, dead or still busy with abandoned work
+        _process_workers.replace(worker)
+        raise
+    except BaseException:
+        _process_workers.release(worker)
+        raise
+
+    _process_workers.release(worker)
+    return result
+
+
+async def _run_stage(stage: Stage, dep_tasks):
+    args = [await task for task in dep_tasks]
+
+    try:
+        if stage.executor == "process":
+            return await _call_process_stage(stage, args)
+
+        return await asyncio.wait_for(_call_stage(stage, args), stage.timeout)
+    except asyncio.TimeoutError:
+        raise StageError(stage.name, f"timed out after {stage.timeout}s")
+    except StageError:
+        raise
+    except Exception as e:
+        raise StageError(stage.name, f"failed: {e}") from e
+
+
+async def run_pipeline(stages: List[Stage]) -> Dict[str, object]:
+    """
+    Runs stages as soon as their dependencies finish, so independent
+    branches overlap and latency follows the slowest path.
+
+    On the first failure or timeout every other stage is cancelled and the
+    StageError is raised. Process stages that time out or are cancelled
+    have their worker killed and replaced; cancellable thread stages have
+    their cancel_event set, other thread stages just stop being awaited.
+    """
+    tasks = {}
+
+    for stage in _topological_order(stages):
+        tasks[stage.name] = asyncio.create_task(
+            _run_stage(stage, [tasks[dep] for dep in stage.deps]),
+            name=f"stage:{stage.name}"
+        )
+
+    try:
+        done, pending = await asyncio.wait(
+            tasks.values(), return_when=asyncio.FIRST_EXCEPTION
+        )
+    except asyncio.CancelledError:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    failed = [
+        task for task in done
+        if not task.cancelled() and task.exception() is not None
+    ]
+
+    if failed:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        # Report the root cause, not a dependent that saw the same error
+        for stage in _topological_order(stages):
+            task = tasks[stage.name]
+            if task in failed:
+                raise task.exception()
+
+    return {name: task.result() for name, task in tasks.items()}
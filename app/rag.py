@@ -1,10 +1,18 @@
 import os
 import faiss
+import hashlib
+import threading
 import numpy as np
 import json
 from sentence_transformers import SentenceTransformer
 from openai import OpenAI
-from app.config import EMBEDDING_MODEL, VECTOR_STORE_PATH
+from app.config import (
+    EMBEDDING_MODEL,
+    VECTOR_STORE_PATH,
+    JOB_DESCRIPTION_PATH,
+    HIRING_POLICY_PATH,
+    STAGE_TIMEOUTS
+)
 import re
 
 embedding_model = SentenceTransformer(EMBEDDING_MODEL)
@@ -12,6 +20,8 @@ embedding_model = SentenceTransformer(EMBEDDING_MODEL)
 client = OpenAI(
     api_key=os.getenv("OPENROUTER_API_KEY"),
     base_url="https://openrouter.ai/api/v1",
+    # Never wait on a request longer than the required_skills stage allows
+    timeout=STAGE_TIMEOUTS["required_skills"],
 )
 
 MODEL_NAME = "meta-llama/llama-3.1-8b-instruct"
@@ -24,7 +34,7 @@ def build_vector_store(documents):
     index = faiss.IndexFlatL2(dimension)
     index.add(np.array(embeddings))
 
-    os.makedirs("vector_store", exist_ok=True)
+    os.makedirs(os.path.dirname(VECTOR_STORE_PATH), exist_ok=True)
     faiss.write_index(index, VECTOR_STORE_PATH)
 
 
@@ -32,12 +42,13 @@ def load_vector_store():
     return faiss.read_index(VECTOR_STORE_PATH)
 
 
-def retrieve_context(query: str, documents, top_k=2):
-    index = load_vector_store()
+def retrieve_context(query: str, documents, top_k=2, index=None):
+    if index is None:
+        index = load_vector_store()
     query_embedding = embedding_model.encode([query])
     distances, indices = index.search(np.array(query_embedding), top_k)
 
-    return [documents[i] for i in indices[0]]
+    return [documents[i] for i in indices[0] if i != -1]
 
 
 def extract_required_skills_from_context(context: str):
@@ -90,4 +101,137 @@ Job Description:
 
     json_string = raw_output[start:end+1]
 
-    return json.loads(json_string)
\ No newline at end of file
+    return json.loads(json_string)
+
+
+# -----------------------------
+# Hot-Reloadable Knowledge Base
+# -----------------------------
+
+DOCUMENT_PATHS = [JOB_DESCRIPTION_PATH, HIRING_POLICY_PATH]
+
+
+def _content_hash(document: str) -> str:
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+class KnowledgeSnapshot:
+    """
+    Point-in-time view of the RAG documents and their FAISS index.
+
+    Tasks hold on to the snapshot they started with, so a reload never
+    changes the documents an in-flight task is scored against.
+    """
+
+    def __init__(self, documents, index, embeddings, mtimes):
+        self.documents = documents
+        self.index = index
+        self.embeddings = embeddings
+        self.mtimes = mtimes
+        self.version = _content_hash(
+            "".join(_content_hash(doc) for doc in documents)
+        )[:12]
+
+        self._required_skills = None
+        self._skills_lock = threading.Lock()
+
+    def retrieve(self, query: str, top_k=2):
+        return retrieve_context(query, self.documents, top_k, index=self.index)
+
+    def required_skills(self, context_docs=None):
+        """
+        Required skills derived from this snapshot, computed once per version.
+        """
+        with self._skills_lock:
+            if self._required_skills is None:
+                if context_docs is None:
+                    context_docs = self.retrieve("required skills")
+                self._required_skills = extract_required_skills_from_context(
+                    "\n".join(context_docs)
+                )
+
+            return list(self._required_skills)
+
+
+_knowledge = None
+_reload_lock = threading.Lock()
+
+
+def _document_mtimes():
+    return [os.path.getmtime(path) for path in DOCUMENT_PATHS]
+
+
+def build_knowledge_snapshot(documents, mtimes, previous=None):
+    """
+    Builds a snapshot, re-embedding only documents whose content changed.
+    """
+    embeddings = dict(previous.embeddings) if previous else {}
+    hashes = [_content_hash(doc) for doc in documents]
+
+    changed = [
+        (h, doc) for h, doc in zip(hashes, documents)
+        if h not in embeddings
+    ]
+
+    if changed:
+        vectors = embedding_model.encode([doc for _, doc in changed])
+        for (h, _), vector in zip(changed, vectors):
+            embeddings[h] = np.asarray(vector, dtype="float32")
+
+    # Drop embeddings of documents that are no longer loaded
+    embeddings = {h: embeddings[h] for h in hashes}
+
+    matrix = np.stack([embeddings[h] for h in hashes])
+
+    index = faiss.IndexFlatL2(matrix.shape[1])
+    index.add(matrix)
+
+    os.makedirs(os.path.dirname(VECTOR_STORE_PATH), exist_ok=True)
+    faiss.write_index(index, VECTOR_STORE_PATH)
+
+    return KnowledgeSnapshot(documents, index, embeddings, mtimes)
+
+
+def reload_knowledge(force=False):
+    """
+    Re-reads the RAG documents and swaps in a new snapshot if they changed.
+
+    Returns (snapshot, reloaded).
+    """
+    global _knowledge
+
+    with _reload_lock:
+        mtimes = _document_mtimes()
+        documents = []
+        for path in DOCUMENT_PATHS:
+            with open(path) as f:
+                documents.append(f.read())
+
+        current = _knowledge
+
+        if (
+            current is not None
+            and not force
+            and current.documents == documents
+        ):
+            current.mtimes = mtimes
+            return current, False
+
+        snapshot = build_knowledge_snapshot(documents, mtimes, previous=current)
+
+        # Single reference assignment: readers see either the old or new snapshot
+        _knowledge = snapshot
+
+        return snapshot, True
+
+
+def get_knowledge() -> KnowledgeSnapshot:
+    if _knowledge is None:
+        return reload_knowledge()[0]
+    return _knowledge
+
+
+def knowledge_is_stale() -> bool:
+    if _knowledge is None:
+        return True
+    return _document_mtimes() != _knowledge.mtimes
@@ -0,0 +1,255 @@
+from typing import List
+
+import numpy as np
+
+from app.config import (
+    MATCH_THRESHOLD_SHORTLIST,
+    MATCH_THRESHOLD_REVIEW,
+    MIN_EXPERIENCE,
+    MIN_EXTRACTION_CONFIDENCE
+)
+from app.database import SessionLocal, CandidateRecord
+
+
+RESCORE_CHUNK_SIZE = 500
+
+# Dry runs return at most this many per-candidate diffs, plus totals
+RESCORE_DIFF_LIMIT = 100
+
+
+# -----------------------------
+# Vectorized Matching + Routing
+# -----------------------------
+
+def _skill_matrix(skill_lists, vocabulary):
+    """
+    Boolean candidates x skills membership matrix (case-insensitive).
+    """
+    column = {skill: i for i, skill in enumerate(vocabulary)}
+    matrix = np.zeros((len(skill_lists), len(vocabulary)), dtype=bool)
+
+    for row, skills in enumerate(skill_lists):
+        for skill in skills:
+            col = column.get(str(skill).lower())
+            if col is not None:
+                matrix[row, col] = True
+
+    return matrix
+
+
+def score_pool(extractions: List[dict],
+               required_skills: List[str],
+               min_experience: float = MIN_EXPERIENCE,
+               shortlist_threshold: float = MATCH_THRESHOLD_SHORTLIST,
+               review_threshold: float = MATCH_THRESHOLD_REVIEW,
+               min_confidence: float = MIN_EXTRACTION_CONFIDENCE):
+    """
+    Same rules as compute_match() + route_candidate(), applied to a whole
+    batch of stored extractions at once.
+    """
+    vocabulary = list(dict.fromkeys(s.lower() for s in required_skills))
+    membership = _skill_matrix(
+        [e.get("skills") or [] for e in extractions],
+        vocabulary
+    )
+
+    experience = np.array(
+        [float(e.get("years_of_experience") or 0) for e in extractions]
+    )
+    confidence = np.array(
+        [float(e.get("extraction_confidence") or 0) for e in extractions]
+    )
+
+    skill_score = membership.sum(axis=1) / max(len(required_skills), 1)
+    experience_gap = experience < min_experience
+    raw_score = skill_score * 0.7 + (~experience_gap).astype(float) * 0.3
+
+    # Python's round() so scores match compute_match() exactly
+    match_score = np.array([round(float(x), 2) for x in raw_score])
+
+    conditions = [
+        confidence < min_confidence,
+        (match_score >= shortlist_threshold) & ~experience_gap,
+        match_score >= review_threshold
+    ]
+    recommendation = np.select(
+        conditions,
+        ["Human Review", "Shortlisted", "Human Review"],
+        default="Rejected"
+    )
+    review_reason = np.select(
+        conditions,
+        ["Low extraction confidence", "", "Partial skill match"],
+        default="Insufficient skill match"
+    )
+
+    # Duplicated required skills are kept, as in compute_match()
+    required_columns = [vocabulary.index(s.lower()) for s in required_skills]
+    missing = [
+        [
+            skill for skill, col in zip(required_skills, required_columns)
+            if not row[col]
+        ]
+        for row in membership
+    ]
+
+    return {
+        "match_score": match_score,
+        "experience_gap": experience_gap,
+        "recommendation": recommendation,
+        "review_reason": review_reason,
+        "missing_skills": missing
+    }
+
+
+# -----------------------------
+# Bulk Re-scoring Job
+# -----------------------------
+
+def _iter_chunks(db, chunk_size):
+    """
+    Keyset pagination over completed records, one chunk in memory at a time.
+    """
+    last_id = 0
+
+    while True:
+        records = db.query(CandidateRecord).filter(
+            CandidateRecord.id > last_id,
+            CandidateRecord.status == "completed",
+            CandidateRecord.extracted_data.isnot(None)
+        ).order_by(CandidateRecord.id).limit(chunk_size).all()
+
+        if not records:
+            return
+
+        last_id = records[-1].id
+        yield records
+
+
+def _as_dict(value):
+    # Columns are decoded by EncodedJSON; anything but an object is unusable
+    return dict(value) if isinstance(value, dict) else {}
+
+
+def rescore_candidates(required_skills: List[str],
+                       min_experience: float = MIN_EXPERIENCE,
+                       shortlist_threshold: float = MATCH_THRESHOLD_SHORTLIST,
+                       review_threshold: float = MATCH_THRESHOLD_REVIEW,
+                       document_version: str = None,
+                       dry_run: bool = False,
+                       diff_limit: int = RESCORE_DIFF_LIMIT,
+                       chunk_size: int = RESCORE_CHUNK_SIZE):
+    """
+    Re-scores every stored candidate from its saved extraction, without
+    calling the LLM. Changes are written back one transaction per chunk;
+    with dry_run=True nothing is written and the first `diff_limit`
+    changes are returned instead, alongside the full counts.
+    """
+    db = SessionLocal()
+
+    scanned = 0
+    changed = 0
+    changes = []
+
+    try:
+        for records in _iter_chunks(db, chunk_size):
+            scanned += len(records)
+
+            rows = []
+            for record in records:
+                extracted = _as_dict(record.extracted_data)
+                if extracted:
+                    rows.append((record, extracted))
+
+            if not rows:
+                db.expunge_all()
+                continue
+
+            scores = score_pool(
+                [extracted for _, extracted in rows],
+                required_skills,
+                min_experience=min_experience,
+                shortlist_threshold=shortlist_threshold,
+                review_threshold=review_threshold
+            )
+
+            mappings = []
+
+            for i, (record, _) in enumerate(rows):
+                match_score = float(scores["match_score"][i])
+                recommendation = str(scores["recommendation"][i])
+                review_reason = str(scores["review_reason"][i])
+                missing_skills = scores["missing_skills"][i]
+                new_version = document_version or record.document_version
+
+                old_logs = _as_dict(record.reasoning_logs)
+
+                # Logs feed the dashboard/CSV, so they must follow the skills
+                # even when the score itself does not move
+                if (
+                    record.match_score == match_score
+                    and record.recommendation == recommendation
+                    and (record.review_reason or "") == review_reason
+                    and old_logs.get("missing_skills") == missing_skills
+                    and old_logs.get("required_skills") == required_skills
+                    and record.document_version == new_version
+                ):
+                    continue
+
+                changed += 1
+
+                if dry_run:
+                    if len(changes) >= diff_limit:
+                        continue
+
+                    changes.append({
+                        "task_id": record.task_id,
+                        "name": record.name,
+                        "match_score": [record.match_score, match_score],
+                        "recommendation": [record.recommendation, recommendation],
+                        "review_reason": [record.review_reason, review_reason],
+                        "missing_skills": [
+                            old_logs.get("missing_skills"), missing_skills
+                        ],
+                        "document_version": [record.document_version, new_version]
+                    })
+                    continue
+
+                logs = dict(old_logs)
+                logs.update({
+                    "required_skills": required_skills,
+                    "match_score": match_score,
+                    "missing_skills": missing_skills,
+                    "recommendation": recommendation,
+                    "document_version": new_version
+                })
+
+                mappings.append({
+                    "id": record.id,
+                    "match_score": match_score,
+                    "recommendation": recommendation,
+                    "review_reason": review_reason,
+                    "document_version": new_version,
+                    "reasoning_logs": logs
+                })
+
+            if mappings:
+                db.bulk_update_mappings(CandidateRecord, mappings)
+                db.commit()
+
+            db.expunge_all()
+
+    finally:
+        db.close()
+
+    result = {
+        "scanned": scanned,
+        "changed": changed,
+        "dry_run": dry_run
+    }
+
+    if dry_run:
+        result["changes"] = changes
+        result["changes_truncated"] = changed > len(changes)
+
+    return result
@@ -1,4 +1,8 @@
-from app.config import MATCH_THRESHOLD_SHORTLIST, MATCH_THRESHOLD_REVIEW
+from app.config import (
+    MATCH_THRESHOLD_SHORTLIST,
+    MATCH_THRESHOLD_REVIEW,
+    MIN_EXTRACTION_CONFIDENCE
+)
 from app.schemas import MatchResult
 
 
@@ -7,7 +11,7 @@ def route_candidate(result: MatchResult,
 
     review_reason = ""
 
-    if extraction_confidence < 0.75:
+    if extraction_confidence < MIN_EXTRACTION_CONFIDENCE:
         status = "Human Review"
         review_reason = "Low extraction confidence"
 
@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+
+import pdfplumber
+from fastapi import UploadFile, HTTPException
+from fastapi.responses import JSONResponse
+
+from app.blob_store import store_blob
+from app.config import MAX_UPLOAD_BYTES, MAX_PDF_PAGES
+
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+PDF_MAGIC = b"%PDF-"
+
+# Allowance for multipart boundaries and form fields around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes"
+    )
+
+
+# -----------------------------
+# Raw Body Limit (ASGI)
+# -----------------------------
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps the raw request body of upload endpoints before Starlette spools
+    the multipart form: requests with a larger Content-Length are refused
+    up front, and chunked bodies are cut off once they pass the limit.
+    """
+
+    def __init__(self, app, paths, max_bytes: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length", b"")
+
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing
+                    raise _too_large()
+
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            if response_started or e.status_code != 413:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        error = _too_large()
+        response = JSONResponse(
+            status_code=error.status_code,
+            content={"detail": error.detail}
+        )
+        await response(scope, receive, send)
+
+
+# -----------------------------
+# Upload Validation
+# -----------------------------
+
+class ValidatedUpload:
+    """
+    An upload checked in place in Starlette's spooled file: hashed, size
+    limited, and confirmed to be a PDF with an acceptable page count.
+    """
+
+    def __init__(self, file: UploadFile):
+        self.file = file
+        self.filename = file.filename
+        self.size = 0
+        self.digest = None
+        self.page_count = None
+
+
+def _count_pages(fileobj) -> int:
+    fileobj.seek(0)
+    with pdfplumber.open(fileobj) as pdf:
+        return len(pdf.pages)
+
+
+async def receive_upload(file: UploadFile) -> ValidatedUpload:
+    """
+    Reads the uploaded resume in chunks to hash it and enforce the size
+    limit, then validates the PDF before it is accepted for processing.
+    No copy of the file is made.
+    """
+    upload = ValidatedUpload(file)
+    sha = hashlib.sha256()
+    header = b""
+
+    await file.seek(0)
+
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+
+        if len(header) < len(PDF_MAGIC):
+            header += chunk[:len(PDF_MAGIC) - len(header)]
+            if not PDF_MAGIC.startswith(header):
+                raise HTTPException(status_code=415, detail="File is not a PDF")
+
+        upload.size += len(chunk)
+        if upload.size > MAX_UPLOAD_BYTES:
+            raise _too_large()
+
+        sha.update(chunk)
+
+    if header != PDF_MAGIC:
+        raise HTTPException(status_code=415, detail="File is not a PDF")
+
+    upload.digest = sha.hexdigest()
+
+    try:
+        upload.page_count = await asyncio.to_thread(_count_pages, file.file)
+    except Exception:
+        raise HTTPException(status_code=422, detail="PDF could not be read")
+
+    if upload.page_count == 0 or upload.page_count > MAX_PDF_PAGES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"PDF must have between 1 and {MAX_PDF_PAGES} pages"
+        )
+
+    return upload
+
+
+async def store_upload(upload: ValidatedUpload) -> str:
+    """
+    Streams a validated upload straight from its spooled file into the
+    blob store; nothing is written if the content is already stored.
+    """
+    upload.file.file.seek(0)
+    return await asyncio.to_thread(store_blob, upload.file.file, upload.digest)